@@ -2,35 +2,105 @@
 
 提供基于QThread的异步通信实现，用于处理耗时的设备通信操作。
 包含异步串口和TCP通信类，支持非阻塞数据收发。
+另提供运行在asyncio事件循环上的TCP通信实现，无需独立通信线程。
 """
 
 from PySide6.QtCore import QThread, Signal, QObject
 from spectrometer_gui.protocol_handler import ProtocolHandler
+import asyncio
+import numpy as np
+import selectors
 import serial
 import socket
-import time
+from collections import deque
+
+def _extract_frames(buffer):
+    """从接收缓冲区中取出并解析全部完整数据帧
+
+    光强度帧是扫描时的高频数据，走快速路径直接汇总为数值数组，
+    其余帧解析为数据字典。
+
+    Args:
+        buffer (bytearray): 接收缓冲区，不完整的数据保留在其中
+
+    Returns:
+        tuple: (解析后的数据字典列表, 光强度数组np.ndarray[float32])
+    """
+    frames = []
+    intensities = []
+    start = 0
+    # 通过memoryview切片取帧，避免逐帧复制；全部处理完后统一压缩缓冲区
+    with memoryview(buffer) as view:
+        while True:
+            end = buffer.find(b'\n', start)
+            if end < 0:
+                break
+            if end - start > 1:  # 跳过空行
+                frame = view[start:end + 1]
+                # 先按帧头前缀分流，非强度帧（含大体积光谱帧）只做一次正则匹配
+                intensity = None
+                if buffer.startswith(b'$INT ', start):
+                    intensity = ProtocolHandler.parse_intensity_bytes(frame)
+                if intensity is not None:
+                    intensities.append(intensity)
+                else:
+                    frames.append(ProtocolHandler.parse_response_bytes(frame))
+                del frame
+            start = end + 1
+    del buffer[:start]
+    return frames, np.array(intensities, dtype=np.float32)
 
 class CommunicationThread(QThread):
     """通信线程基类
 
     处理耗时的数据收发操作，避免阻塞主线程。
+    每次唤醒解析出的全部数据帧通过data_batch_received一次性发出，
+    光强度数据汇总为数组通过intensity_block_received发出，
+    以减少跨线程信号的派发次数。
     """
-    data_received = Signal(dict)
+    data_batch_received = Signal(list)
+    intensity_block_received = Signal(object)
     error_occurred = Signal(str)
 
+    # 单次合并写入的最大字节数，超出部分拆分为多次写入
+    max_batch_bytes = 4096
+
     def __init__(self):
         super().__init__()
         self._running = False
-        self._command_queue = []
+        # GUI线程单生产者、工作线程单消费者，deque的append/popleft为原子操作
+        self._command_queue = deque()
 
     def add_command(self, cmd_type, **kwargs):
         """添加待发送的命令到队列"""
         command = ProtocolHandler.build_command(cmd_type, **kwargs)
         self._command_queue.append(command)
+        self._wakeup()
+
+    def _take_batch(self):
+        """取出当前排队的全部命令并合并为一次写入的数据
+
+        Returns:
+            bytes: 合并后的命令数据，队列为空时返回b''
+        """
+        batch = []
+        size = 0
+        while size < self.max_batch_bytes:
+            try:
+                command = self._command_queue.popleft()
+            except IndexError:
+                break
+            batch.append(command)
+            size += len(command)
+        return b''.join(batch)
+
+    def _wakeup(self):
+        """唤醒阻塞等待中的工作线程，由子类按需实现"""
 
     def stop(self):
         """停止线程运行"""
         self._running = False
+        self._wakeup()
         self.wait()
 
 class SerialThread(CommunicationThread):
@@ -44,33 +114,46 @@ class SerialThread(CommunicationThread):
         self.baudrate = baudrate
         self._serial = None
 
+    def _wakeup(self):
+        # 中断read_until的阻塞等待，使新命令无需等到读超时即可发出
+        serial_port = self._serial
+        if serial_port is not None:
+            try:
+                serial_port.cancel_read()
+            except (OSError, serial.SerialException):
+                pass  # 端口已关闭，线程即将退出
+
     def run(self):
         try:
+            # 短超时的阻塞读：线程挂起在read_until中直到有数据到达，
+            # 新命令入队时由_wakeup中断等待，超时仅作为兜底
             self._serial = serial.Serial(
                 port=self.port,
                 baudrate=self.baudrate,
-                timeout=1
+                timeout=0.05
             )
             self._running = True
+            buffer = bytearray()
 
             while self._running:
-                # 处理发送队列
-                if self._command_queue:
-                    command = self._command_queue.pop(0)
-                    self._serial.write(command.encode())
-                    response = self._serial.readline().decode().strip()
-                    if response:
-                        parsed = ProtocolHandler.parse_response(response)
-                        self.data_received.emit(parsed)
-
-                # 检查是否有新数据
-                if self._serial.in_waiting:
-                    data = self._serial.readline().decode().strip()
-                    if data:
-                        parsed = ProtocolHandler.parse_response(data)
-                        self.data_received.emit(parsed)
-                
-                time.sleep(0.01)  # 避免CPU占用过高
+                # 处理发送队列，排队的命令合并为一次写入
+                batch = self._take_batch()
+                while batch:
+                    self._serial.write(batch)
+                    batch = self._take_batch()
+
+                # 阻塞等待数据，随后一并取走已到达的剩余字节，
+                # 超时返回的不完整帧留在缓冲区待下次拼接
+                buffer += self._serial.read_until(b'\n')
+                waiting = self._serial.in_waiting
+                if waiting:
+                    buffer += self._serial.read(waiting)
+
+                frames, intensities = _extract_frames(buffer)
+                if len(intensities):
+                    self.intensity_block_received.emit(intensities)
+                if frames:
+                    self.data_batch_received.emit(frames)
 
         except serial.SerialException as e:
             self.error_occurred.emit(f'Serial error: {str(e)}')
@@ -88,45 +171,67 @@ class TcpThread(CommunicationThread):
         self.host = host
         self.port = port
         self._socket = None
+        # 自唤醒套接字对：GUI线程添加命令时写入一个字节以唤醒selector
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_w.setblocking(False)
+
+    def _wakeup(self):
+        try:
+            self._wakeup_w.send(b'\0')
+        except OSError:
+            pass  # 缓冲区已满说明唤醒尚未被处理，或线程已退出
 
     def run(self):
+        sel = selectors.DefaultSelector()
         try:
             self._socket = socket.create_connection(
                 (self.host, self.port),
                 timeout=3
             )
-            self._socket.settimeout(1)  # 设置接收超时
+            self._socket.settimeout(None)  # 由selector负责等待，收发不再超时
+            # 关闭Nagle算法：命令帧很小，且发送端已按批合并写入，无需内核再延迟合并
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 65536)
+            sel.register(self._socket, selectors.EVENT_READ)
+            sel.register(self._wakeup_r, selectors.EVENT_READ)
             self._running = True
+            buffer = bytearray()
+            chunk = bytearray(4096)
 
             while self._running:
-                # 处理发送队列
-                if self._command_queue:
-                    command = self._command_queue.pop(0)
-                    self._socket.sendall(command.encode())
-                    try:
-                        response = self._socket.recv(1024).decode().strip()
-                        if response:
-                            parsed = ProtocolHandler.parse_response(response)
-                            self.data_received.emit(parsed)
-                    except socket.timeout:
-                        pass
-
-                # 检查是否有新数据
-                try:
-                    data = self._socket.recv(1024).decode().strip()
-                    if data:
-                        parsed = ProtocolHandler.parse_response(data)
-                        self.data_received.emit(parsed)
-                except socket.timeout:
-                    pass
-
-                time.sleep(0.01)  # 避免CPU占用过高
+                # 处理发送队列，排队的命令合并为一次写入
+                batch = self._take_batch()
+                while batch:
+                    self._socket.sendall(batch)
+                    batch = self._take_batch()
+
+                # 阻塞直到套接字可读或有新命令入队
+                for key, _ in sel.select():
+                    if key.fileobj is self._wakeup_r:
+                        self._wakeup_r.recv(4096)
+                        continue
+
+                    count = self._socket.recv_into(chunk)
+                    if not count:
+                        raise ConnectionError('Connection closed by peer')
+                    with memoryview(chunk) as view:
+                        buffer += view[:count]
+
+                # 按帧分隔符拆分，剩余不完整数据留在缓冲区
+                frames, intensities = _extract_frames(buffer)
+                if len(intensities):
+                    self.intensity_block_received.emit(intensities)
+                if frames:
+                    self.data_batch_received.emit(frames)
 
         except socket.error as e:
             self.error_occurred.emit(f'TCP error: {str(e)}')
         finally:
+            sel.close()
             if self._socket:
                 self._socket.close()
+            self._wakeup_r.close()
+            self._wakeup_w.close()
 
 class AsyncCommunicator(QObject):
     """异步通信管理器
@@ -135,7 +240,9 @@ class AsyncCommunicator(QObject):
     提供统一的通信接口。
     """
     connection_changed = Signal(bool)
-    data_received = Signal(dict)
+    data_received = Signal(object)  # ParsedFrame
+    data_batch_received = Signal(list)
+    intensity_block_received = Signal(object)  # 光强度数组np.ndarray[float32]
     error_occurred = Signal(str)
 
     def __init__(self):
@@ -164,7 +271,8 @@ class AsyncCommunicator(QObject):
                 port=kwargs.get('port')
             )
 
-        self._comm_thread.data_received.connect(self.data_received.emit)
+        self._comm_thread.data_batch_received.connect(self._handle_batch)
+        self._comm_thread.intensity_block_received.connect(self.intensity_block_received.emit)
         self._comm_thread.error_occurred.connect(self._handle_error)
         self._comm_thread.start()
         self._connected = True
@@ -188,7 +296,96 @@ class AsyncCommunicator(QObject):
         if self._comm_thread and self._connected:
             self._comm_thread.add_command(cmd_type, **kwargs)
 
+    def _handle_batch(self, frames):
+        """转发通信线程批量发出的数据帧
+
+        批量信号原样转发，同时在主线程内逐帧发出data_received以兼容逐帧处理的接收方。
+        """
+        self.data_batch_received.emit(frames)
+        for frame in frames:
+            self.data_received.emit(frame)
+
     def _handle_error(self, error_msg):
         """处理通信错误"""
         self.error_occurred.emit(error_msg)
-        self.disconnect()
\ No newline at end of file
+        self.disconnect()
+
+class AsyncIoCommunicator(AsyncCommunicator):
+    """基于asyncio的异步通信管理器
+
+    TCP连接直接运行在与Qt集成的asyncio事件循环（如qasync.QEventLoop）上，
+    由事件循环统一等待套接字读写，省去通信线程及其唤醒开销。
+    串口连接asyncio无原生支持，仍回退到基于线程的SerialThread实现。
+    """
+    def __init__(self):
+        super().__init__()
+        self._writer = None
+        self._read_task = None
+
+    def connect(self, interface_type, **kwargs):
+        """建立设备连接
+
+        Args:
+            interface_type (str): 接口类型，'serial'或'tcp'
+            **kwargs: 连接参数
+        """
+        if interface_type != 'tcp':
+            super().connect(interface_type, **kwargs)
+            return
+
+        if self._connected or self._read_task:
+            self.disconnect()
+        self._read_task = asyncio.ensure_future(
+            self._run_tcp(kwargs.get('host'), kwargs.get('port'))
+        )
+
+    async def _run_tcp(self, host, port):
+        """TCP连接的收发协程，持续读取并批量解析数据帧"""
+        try:
+            reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port), timeout=3
+            )
+            sock = self._writer.get_extra_info('socket')
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._connected = True
+            self.connection_changed.emit(True)
+
+            buffer = bytearray()
+            while True:
+                chunk = await reader.read(4096)
+                if not chunk:
+                    raise ConnectionError('Connection closed by peer')
+                buffer += chunk
+                frames, intensities = _extract_frames(buffer)
+                if len(intensities):
+                    self.intensity_block_received.emit(intensities)
+                if frames:
+                    self._handle_batch(frames)
+
+        except (OSError, asyncio.TimeoutError) as e:
+            self._read_task = None  # 协程即将结束，断开时无需再取消
+            self._handle_error(f'TCP error: {str(e)}')
+
+    def disconnect(self):
+        """断开设备连接"""
+        if self._read_task:
+            self._read_task.cancel()
+            self._read_task = None
+        if self._writer:
+            self._writer.close()
+            self._writer = None
+        super().disconnect()
+
+    def send_command(self, cmd_type, **kwargs):
+        """发送命令
+
+        Args:
+            cmd_type (str): 命令类型
+            **kwargs: 命令参数
+        """
+        if self._writer and self._connected:
+            # 写入传输层缓冲区，由事件循环在套接字可写时发出
+            command = ProtocolHandler.build_command(cmd_type, **kwargs)
+            self._writer.write(command)
+        else:
+            super().send_command(cmd_type, **kwargs)
@@ -5,30 +5,45 @@
 包含基础通信协议处理、连接状态管理以及数据收发功能。
 """
 
+import asyncio
 import serial
 import socket
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from PySide6.QtCore import QObject, Signal
-from spectrometer_gui.protocol_handler import ProtocolHandler
+from spectrometer_gui.protocol_handler import ProtocolHandler, ParsedFrame
 
 class BaseCommunicator(QObject):
     """
     通信基类
 
     定义通信组件的通用接口和基础功能，包含连接状态管理、数据收发信号。
+    阻塞的设备读写与响应解析在单个后台线程中按提交顺序执行，
+    解析结果经data_received信号以队列连接方式回到界面线程。
 
     Attributes:
-        data_received (Signal[dict]): 当收到完整数据包时触发，携带解析后的数据字典
+        data_received (Signal[ParsedFrame]): 当收到完整数据包时触发，携带解析结果
         connection_changed (Signal[bool]): 连接状态变化时触发，True表示已连接，False表示断开
 
     Args:
         QObject (QObject): 继承自Qt核心对象以支持信号槽机制
     """
-    data_received = Signal(dict)
+    data_received = Signal(object)
     connection_changed = Signal(bool)
 
     def __init__(self):
         super().__init__()
         self._is_connected = False
+        # 等待响应的命令Future，设备按发送顺序逐条应答
+        self._pending = deque()
+        # 同一事件循环周期内发出的指令合并为一次写入
+        self._tx_buffer = bytearray()
+        self._tx_count = 0
+        self._flush_scheduled = False
+        # 单线程保证指令写入与响应解析的顺序
+        self._io_executor = ThreadPoolExecutor(max_workers=1)
+        self._io_remaining = 0
+        self.data_received.connect(self._resolve_pending)
 
     def connect(self, **kwargs):
         """
@@ -46,8 +61,69 @@ class BaseCommunicator(QObject):
         raise NotImplementedError
 
     def send_command(self, cmd_type, **kwargs):
+        """
+        发送指令
+
+        Args:
+            cmd_type (str): 指令类型，见ProtocolHandler.COMMAND_SET
+            **kwargs: 指令参数
+
+        Returns:
+            asyncio.Future: 收到该指令的响应时完成，结果为ParsedFrame
+        """
         command = ProtocolHandler.build_command(cmd_type, **kwargs)
-        self._raw_send(command)
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._pending.append(future)
+        self._tx_buffer += command
+        self._tx_count += 1
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            loop.call_soon(self._flush_tx)
+        return future
+
+    def _flush_tx(self):
+        """将累积的指令一次性写入设备，并读取对应数量的响应"""
+        self._flush_scheduled = False
+        data = bytes(self._tx_buffer)
+        count = self._tx_count
+        self._tx_buffer.clear()
+        self._tx_count = 0
+        self._io_executor.submit(self._io_worker, data, count)
+
+    def _io_worker(self, data, count):
+        """
+        后台线程中执行的读写任务
+
+        未连接或通信异常时为每条未应答的指令发出一个无效响应，避免等待中的指令永不完成
+        """
+        self._io_remaining = count
+        error = 'Device not connected'
+        try:
+            self._raw_send(data, count)
+        except OSError as e:
+            error = f'Communication error: {str(e)}'
+        for _ in range(self._io_remaining):
+            self.data_received.emit(ParsedFrame(False, error=error))
+
+    def _emit_response(self, parsed):
+        """发出一条指令的解析结果（由_raw_send在后台线程中调用）"""
+        self._io_remaining -= 1
+        self.data_received.emit(parsed)
+
+    def _resolve_pending(self, response):
+        """
+        用收到的响应完成最早发出的等待中指令
+
+        后台线程为每条指令恰好读取一行应答，响应与指令按顺序一一对应，
+        命令标识不同的应答（如设备返回ERR）同样由最早的指令接收；
+        已超时或取消的指令仍消耗其应答，保持后续指令的对应关系
+        """
+        if not self._pending:
+            return
+        future = self._pending.popleft()
+        if not future.done():
+            future.set_result(response)
 
 class SerialCommunicator(BaseCommunicator):
     """
@@ -79,14 +155,17 @@ class SerialCommunicator(BaseCommunicator):
             self._is_connected = True
             self.connection_changed.emit(True)
         except serial.SerialException as e:
-            self.data_received.emit({'error': f'Serial connection failed: {str(e)}'})
+            self.data_received.emit(ParsedFrame(False, error=f'Serial connection failed: {str(e)}'))
 
-    def _raw_send(self, data):
+    def _raw_send(self, data, count=1):
         if self._serial:
-            self._serial.write(data.encode())
-            response = self._serial.readline().decode().strip()
-            parsed = ProtocolHandler.parse_response(response)
-            self.data_received.emit(parsed)
+            # 单次write加flush，使驱动将全部指令打包为尽量少的USB传输
+            self._serial.write(data)
+            self._serial.flush()
+            for _ in range(count):
+                response = self._serial.readline()
+                parsed = ProtocolHandler.parse_response_bytes(response)
+                self._emit_response(parsed)
 
 class TcpCommunicator(BaseCommunicator):
     """
@@ -100,6 +179,7 @@ class TcpCommunicator(BaseCommunicator):
     def __init__(self):
         super().__init__()
         self._socket = None
+        self._rx_buffer = bytearray()
 
     def connect(self, host, port=5000, timeout=3):
         """
@@ -115,24 +195,38 @@ class TcpCommunicator(BaseCommunicator):
         """
         try:
             self._socket = socket.create_connection((host, port), timeout=timeout)
+            # 关闭Nagle算法：命令帧很小，延迟合并只会增加交互命令的响应时间
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 65536)
             self._is_connected = True
             self.connection_changed.emit(True)
         except socket.error as e:
-            self.data_received.emit({'error': f'TCP connection failed: {str(e)}'})
+            self.data_received.emit(ParsedFrame(False, error=f'TCP connection failed: {str(e)}'))
 
-    def _raw_send(self, data):
+    def _raw_send(self, data, count=1):
         """
         原始数据发送实现（TCP版本）
 
         Args:
-            data (str): 要发送的原始字符串数据
+            data (bytes): 要发送的指令帧，可包含多条指令
+            count (int, optional): data中的指令条数，即需要等待的响应数，默认1
 
         Raises:
             ConnectionError: 当网络连接异常中断时抛出
             TimeoutError: 当响应超时时抛出
         """
         if self._socket:
-            self._socket.sendall(data.encode())
-            response = self._socket.recv(1024).decode().strip()
-            parsed = ProtocolHandler.parse_response(response)
-            self.data_received.emit(parsed)
\ No newline at end of file
+            self._socket.sendall(data)
+            while count > 0:
+                end = self._rx_buffer.find(b'\n')
+                if end < 0:
+                    chunk = self._socket.recv(1024)
+                    if not chunk:
+                        raise ConnectionError('Connection closed by peer')
+                    self._rx_buffer += chunk
+                    continue
+                response = bytes(self._rx_buffer[:end + 1])
+                del self._rx_buffer[:end + 1]
+                parsed = ProtocolHandler.parse_response_bytes(response)
+                self._emit_response(parsed)
+                count -= 1
\ No newline at end of file
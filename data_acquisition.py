@@ -3,11 +3,13 @@
 提供光谱数据采集、处理和分析功能，包括波长扫描、峰值检测等。
 """
 
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QObject, Signal, QTimer
 import numpy as np
+from scipy.signal import peak_widths
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Optional
 from enum import Enum
+import time
 
 class ScanMode(Enum):
     """扫描模式枚举"""
@@ -28,16 +30,24 @@ class ScanConfig:
 @dataclass
 class SpectrumData:
     """光谱数据结构"""
-    wavelengths: List[float]
-    intensities: List[float]
+    wavelengths: np.ndarray
+    intensities: np.ndarray
     timestamp: float
 
 @dataclass
-class PeakData:
-    """峰值数据结构"""
-    wavelength: float
-    intensity: float
-    fwhm: float  # 半高宽
+class PeakBatch:
+    """峰值数据结构
+
+    以并列数组保存一次检测得到的全部峰值，第i个峰对应各数组的第i个元素。
+    """
+    wavelengths: np.ndarray
+    intensities: np.ndarray
+    fwhm: np.ndarray  # 半高宽
+
+    @property
+    def count(self) -> int:
+        """峰值数量"""
+        return len(self.wavelengths)
 
 class DataAcquisition(QObject):
     """数据采集管理器
@@ -46,15 +56,23 @@ class DataAcquisition(QObject):
     """
     scan_progress = Signal(float)  # 扫描进度信号 0.0-1.0
     scan_completed = Signal(object)  # 扫描完成信号，携带SpectrumData
-    peak_detected = Signal(object)  # 峰值检测信号，携带PeakData
+    peak_detected_batch = Signal(object)  # 峰值检测信号，携带PeakBatch
     error_occurred = Signal(str)  # 错误信号
     state_changed = Signal(str)  # 状态变化信号
 
+    # 允许同时在途的扫描点数（每点一对设置波长/读取强度命令），避免设备缓冲区溢出
+    max_in_flight = 16
+
     def __init__(self, communicator):
         super().__init__()
         self._communicator = communicator
+        self._communicator.intensity_block_received.connect(self._handle_scan_block)
         self._current_scan = None
-        self._scan_data = []
+        self._wavelengths = None
+        self._scan_buf = None
+        self._write_idx = 0
+        self._next_point = 0
+        self._pass_active = False
         self._is_scanning = False
         self._scan_state = 'idle'
         self._repeat_count = 0
@@ -71,7 +89,16 @@ class DataAcquisition(QObject):
 
         self._is_scanning = True
         self._current_scan = config
-        self._scan_data.clear()
+
+        # 计算扫描点数并预分配强度缓冲区
+        num_points = int((config.end_wavelength - config.start_wavelength)
+                         / config.step_size) + 1
+        self._wavelengths = np.linspace(config.start_wavelength,
+                                        config.end_wavelength, num_points,
+                                        dtype=np.float32)
+        self._scan_buf = np.empty(num_points, dtype=np.float32)
+        self._write_idx = 0
+        self._pass_active = False
         self._scan_state = 'scanning'
         self._repeat_count = 0
 
@@ -83,43 +110,39 @@ class DataAcquisition(QObject):
             self._execute_single_scan()
 
     def _execute_single_scan(self):
-        """执行单次扫描"""
-        if not self._current_scan:
-            return
+        """执行单次扫描
 
-        # 计算扫描点数
-        num_points = int((self._current_scan.end_wavelength - self._current_scan.start_wavelength) 
-                        / self._current_scan.step_size) + 1
-        wavelengths = np.linspace(self._current_scan.start_wavelength, 
-                                self._current_scan.end_wavelength, num_points)
+        只提交首批命令，后续命令在收到响应后按在途窗口补充提交，
+        扫描进度和完成处理均由数据回调驱动。
+        """
+        if not self._current_scan or not self._is_scanning or self._pass_active:
+            return
 
-        # 开始扫描
-        for i, wl in enumerate(wavelengths):
-            if not self._is_scanning:
-                break
+        self._pass_active = True
+        self._next_point = 0
+        self._write_idx = 0
+        self._submit_points()
 
+    def _submit_points(self):
+        """在在途窗口允许的范围内提交后续扫描点的命令"""
+        limit = min(len(self._wavelengths), self._write_idx + self.max_in_flight)
+        while self._next_point < limit:
             # 设置波长并读取强度
+            wl = self._wavelengths[self._next_point]
             self._communicator.send_command('set_wavelength', value=wl)
             self._communicator.send_command('read_intensity')
-
-            # 更新进度
-            progress = (i + 1) / num_points
-            self.scan_progress.emit(progress)
-
-        if self._is_scanning:
-            self._handle_scan_complete()
+            self._next_point += 1
 
     def _start_repeat_scan(self):
         """启动重复扫描模式"""
+        if not self._is_scanning:
+            return
         if self._repeat_count < self._current_scan.repeat_count:
             self._repeat_count += 1
             self._execute_single_scan()
-            if self._is_scanning:
-                self._start_repeat_scan()
 
     def _start_auto_scan(self):
         """启动自动扫描模式"""
-        from PySide6.QtCore import QTimer
         if not self._auto_timer:
             self._auto_timer = QTimer(self)
             self._auto_timer.timeout.connect(self._execute_single_scan)
@@ -132,13 +155,19 @@ class DataAcquisition(QObject):
         elif self._current_scan.mode == ScanMode.REPEAT:
             if self._repeat_count >= self._current_scan.repeat_count:
                 self.stop_scan()
+            else:
+                # 下一轮在新的事件循环周期中启动，不在数据回调的调用栈内嵌套
+                QTimer.singleShot(0, self._start_repeat_scan)
         # AUTO模式下继续扫描直到手动停止
 
     def stop_scan(self):
         """停止当前扫描"""
         self._is_scanning = False
+        self._pass_active = False
+        if self._auto_timer:
+            self._auto_timer.stop()
 
-    def detect_peaks(self, spectrum: SpectrumData, threshold: float = 0.1) -> List[PeakData]:
+    def detect_peaks(self, spectrum: SpectrumData, threshold: float = 0.1) -> PeakBatch:
         """检测光谱数据中的峰值
 
         Args:
@@ -146,66 +175,81 @@ class DataAcquisition(QObject):
             threshold: 峰值检测阈值（相对最大值的比例）
 
         Returns:
-            检测到的峰值列表
+            检测到的全部峰值
         """
-        intensities = np.array(spectrum.intensities)
-        wavelengths = np.array(spectrum.wavelengths)
+        # peak_widths要求prominence_data为float64，入口处统一转换（整数、float32谱线均适用）
+        intensities = np.asarray(spectrum.intensities, dtype=np.float64)
+        wavelengths = np.asarray(spectrum.wavelengths)
+        if len(intensities) < 3:
+            # 数据点不足时没有峰值，同样发出空结果
+            empty = np.empty(0, dtype=intensities.dtype)
+            batch = PeakBatch(wavelengths=empty, intensities=empty, fwhm=empty)
+            self.peak_detected_batch.emit(batch)
+            return batch
+
+        # 阈值只依赖整条谱线的最大值，计算一次即可
+        threshold_value = threshold * intensities.max()
 
         # 寻找局部最大值
-        peak_indices = []
-        for i in range(1, len(intensities)-1):
-            if (intensities[i] > intensities[i-1] and 
-                intensities[i] > intensities[i+1] and
-                intensities[i] > threshold * np.max(intensities)):
-                peak_indices.append(i)
-
-        # 计算峰值参数
-        peaks = []
-        for idx in peak_indices:
-            # 计算半高宽
-            half_max = intensities[idx] / 2
-            left_idx = right_idx = idx
-            
-            while left_idx > 0 and intensities[left_idx] > half_max:
-                left_idx -= 1
-            while right_idx < len(intensities)-1 and intensities[right_idx] > half_max:
-                right_idx += 1
-
-            fwhm = wavelengths[right_idx] - wavelengths[left_idx]
-            
-            peak = PeakData(
-                wavelength=wavelengths[idx],
-                intensity=intensities[idx],
-                fwhm=fwhm
-            )
-            peaks.append(peak)
-            self.peak_detected.emit(peak)
-
-        return peaks
-
-    def _handle_scan_data(self, data: dict):
+        center = intensities[1:-1]
+        is_peak = ((center > intensities[:-2]) &
+                   (center > intensities[2:]) &
+                   (center > threshold_value))
+        peak_indices = np.flatnonzero(is_peak) + 1
+
+        # 计算半高宽：以峰值的一半为参考高度，在整条谱线范围内求交点
+        heights = intensities[peak_indices]
+        prominence_data = (heights,
+                           np.zeros_like(peak_indices),
+                           np.full_like(peak_indices, len(intensities) - 1))
+        _, _, left_ips, right_ips = peak_widths(intensities, peak_indices,
+                                                rel_height=0.5,
+                                                prominence_data=prominence_data)
+        index_axis = np.arange(len(wavelengths))
+        fwhms = (np.interp(right_ips, index_axis, wavelengths) -
+                 np.interp(left_ips, index_axis, wavelengths))
+
+        batch = PeakBatch(
+            wavelengths=wavelengths[peak_indices],
+            intensities=heights,
+            fwhm=fwhms
+        )
+        self.peak_detected_batch.emit(batch)
+
+        return batch
+
+    def _handle_scan_block(self, values: np.ndarray):
         """处理扫描数据回调
 
         Args:
-            data: 设备返回的数据字典
+            values: 通信线程一次发出的光强度数组
         """
-        if 'intensity' in data:
-            self._scan_data.append(data['intensity'])
-
-            # 检查是否完成一次扫描
-            if len(self._scan_data) == len(self._current_scan.wavelengths):
-                spectrum = SpectrumData(
-                    wavelengths=self._current_scan.wavelengths,
-                    intensities=self._scan_data,
-                    timestamp=time.time()
-                )
-                self.scan_completed.emit(spectrum)
-                self._scan_data.clear()
-
-                # 处理不同扫描模式
-                if self._current_scan.mode == ScanMode.SINGLE:
-                    self._is_scanning = False
-                elif self._current_scan.mode == ScanMode.REPEAT:
-                    if len(self._completed_scans) >= self._current_scan.repeat_count:
-                        self._is_scanning = False
-                # AUTO模式下继续扫描，直到手动停止
\ No newline at end of file
+        if not self._pass_active:
+            return
+
+        # 批量写入缓冲区；一轮写满后多出的数据直接丢弃，下一轮会重新提交扫描点
+        count = min(len(values), len(self._scan_buf) - self._write_idx)
+        self._scan_buf[self._write_idx:self._write_idx + count] = values[:count]
+        self._write_idx += count
+        self.scan_progress.emit(self._write_idx / len(self._scan_buf))
+
+        # 检查是否完成一次扫描
+        if self._write_idx == len(self._scan_buf):
+            self._finish_pass()
+        else:
+            self._submit_points()
+
+    def _finish_pass(self):
+        """发出一轮完整的扫描数据并处理扫描模式"""
+        spectrum = SpectrumData(
+            wavelengths=self._wavelengths,
+            intensities=self._scan_buf,
+            timestamp=time.time()
+        )
+        self.scan_completed.emit(spectrum)
+        # 已发出的缓冲区归接收方所有，下一轮扫描使用新缓冲区
+        self._scan_buf = np.empty(len(self._wavelengths), dtype=np.float32)
+        self._write_idx = 0
+        self._pass_active = False
+
+        self._handle_scan_complete()
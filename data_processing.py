@@ -7,9 +7,12 @@ class SpectrumProcessor:
         self.wavelengths = None
         
     def set_data(self, wavelengths, intensities):
-        """设置光谱数据"""
-        self.wavelengths = np.array(wavelengths)
-        self.raw_data = np.array(intensities)
+        """设置光谱数据
+
+        已是float32数组的输入不会被复制，处理方法均生成新数组而不修改传入的数据。
+        """
+        self.wavelengths = np.asarray(wavelengths, dtype=np.float32)
+        self.raw_data = np.asarray(intensities, dtype=np.float32)
         
     def find_peaks_threshold(self, height_threshold=None, distance=None):
         """基于阈值的峰值检测
@@ -80,8 +83,17 @@ class SpectrumProcessor:
         if self.raw_data is None:
             raise ValueError("No data available for smoothing")
             
-        kernel = np.ones(window_size) / window_size
-        self.raw_data = np.convolve(self.raw_data, kernel, mode='same')
+        # 累积和实现滑动平均，复杂度O(N)且与窗口大小无关；边缘按端点值延拓
+        padded = np.pad(self.raw_data, (window_size // 2, (window_size - 1) // 2),
+                        mode='edge')
+        # 以float64累加，避免长谱线上float32累积和的精度损失；
+        # 累积和直接写入预留首位0的缓冲区，差分与除法原地完成，减少临时数组
+        cumsum = np.empty(len(padded) + 1, dtype=np.float64)
+        cumsum[0] = 0.0
+        np.cumsum(padded, out=cumsum[1:])
+        smoothed = cumsum[window_size:] - cumsum[:-window_size]
+        smoothed /= window_size
+        self.raw_data = smoothed.astype(np.float32)
     
     def get_processed_data(self):
         """获取处理后的数据"""
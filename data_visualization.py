@@ -7,11 +7,30 @@
 from PySide6.QtCore import QObject, Signal, Qt, QTimer
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel
 from PySide6.QtGui import QPen, QColor
-from pyqtgraph import PlotWidget, mkPen
+import pyqtgraph as pg
+from pyqtgraph import PlotWidget, mkPen, mkBrush
 import numpy as np
 from typing import List, Optional
 from dataclasses import dataclass
 from datetime import datetime
+from collections import deque
+
+# 曲线与峰值标记的画笔/画刷只创建一次，所有点共用同一对象
+_CURVE_PEN = mkPen(color='g', width=2, cosmetic=True)
+_PEAK_PEN = mkPen(color='r', width=2, cosmetic=True)
+_PEAK_BRUSH = mkBrush('r')
+
+def configure_plot_options():
+    """设置pyqtgraph全局绘图选项：关闭抗锯齿，PyOpenGL可用时使用OpenGL绘制
+
+    需在创建PlotWidget之前调用
+    """
+    try:
+        import OpenGL  # noqa: F401
+    except ImportError:
+        pg.setConfigOptions(antialias=False)
+    else:
+        pg.setConfigOptions(useOpenGL=True, enableExperimental=True, antialias=False)
 
 @dataclass
 class PlotConfig:
@@ -29,8 +48,17 @@ class SpectrumPlot(QWidget):
 
     提供实时光谱数据显示和交互功能。
     """
+    # 重绘最小间隔(ms)，约对应60Hz刷新率
+    REDRAW_INTERVAL = 16
+
     def __init__(self, config: PlotConfig):
         super().__init__()
+        self._pending = None
+        # 重绘定时器归本控件所有，控件销毁时随之销毁，不会再访问已删除的曲线
+        self._redraw_timer = QTimer(self)
+        self._redraw_timer.setSingleShot(True)
+        self._redraw_timer.setInterval(self.REDRAW_INTERVAL)
+        self._redraw_timer.timeout.connect(self._flush)
         self._init_ui(config)
         self._setup_plot(config)
         self._setup_controls()
@@ -39,6 +67,7 @@ class SpectrumPlot(QWidget):
         layout = QVBoxLayout()
         
         # 绘图区域
+        configure_plot_options()
         self.plot_widget = PlotWidget(title=config.title)
         layout.addWidget(self.plot_widget)
         
@@ -64,13 +93,16 @@ class SpectrumPlot(QWidget):
         
         # 创建数据曲线
         self.data_curve = self.plot_widget.plot(
-            pen=mkPen(color='g', width=2)
+            pen=_CURVE_PEN
         )
+        # 按视图宽度降采样并裁剪到可见范围，密集谱线只绘制约一屏宽度的点数
+        self.data_curve.setDownsampling(auto=True, method='peak')
+        self.data_curve.setClipToView(True)
         self.peak_scatter = self.plot_widget.plot(
             pen=None,
             symbol='o',
-            symbolPen=mkPen(color='r', width=2),
-            symbolBrush='r'
+            symbolPen=_PEAK_PEN,
+            symbolBrush=_PEAK_BRUSH
         )
         
         # 设置范围
@@ -86,11 +118,21 @@ class SpectrumPlot(QWidget):
     def update_data(self, x: np.ndarray, y: np.ndarray):
         """更新显示数据
 
+        仅记录最新数据，在下一个重绘周期统一绘制，数据到达快于刷新率时合并重绘。
+
         Args:
             x: X轴数据
             y: Y轴数据
         """
-        self.data_curve.setData(x, y)
+        self._pending = (x, y)
+        if not self._redraw_timer.isActive():
+            self._redraw_timer.start()
+
+    def _flush(self):
+        """绘制最近一次更新的数据"""
+        if self._pending is not None:
+            self.data_curve.setData(*self._pending)
+            self._pending = None
 
     def mark_peaks(self, peak_x: List[float], peak_y: List[float]):
         """标记峰值点
@@ -108,6 +150,7 @@ class SpectrumPlot(QWidget):
 
     def clear_data(self):
         """清除显示数据"""
+        self._pending = None
         self.data_curve.clear()
         self.peak_scatter.clear()
         self.peak_label.setText("峰值: --")
@@ -116,26 +159,27 @@ class DataPlayback(QObject):
     """数据回放控制器
 
     提供历史数据的回放和控制功能。
+    回放数据保存在定长环形缓冲区中，超出容量时丢弃最早的帧。
     """
     playback_frame = Signal(object)  # 发送回放帧数据
     playback_finished = Signal()    # 回放结束信号
 
-    def __init__(self):
+    def __init__(self, max_frames: int = 10000):
         super().__init__()
         self._timer = QTimer()
         self._timer.timeout.connect(self._next_frame)
-        self._current_frame = 0
-        self._frames = []
+        self._frames = deque(maxlen=max_frames)
+        self._frame_iter = iter(self._frames)
         self._interval = 100  # 回放间隔(ms)
 
     def load_data(self, data_frames: List):
         """加载回放数据
 
         Args:
-            data_frames: 数据帧列表
+            data_frames: 数据帧列表，超出缓冲区容量时仅保留最后的帧
         """
-        self._frames = data_frames
-        self._current_frame = 0
+        self._frames = deque(data_frames, maxlen=self._frames.maxlen)
+        self._frame_iter = iter(self._frames)
 
     def start(self, interval: Optional[int] = None):
         """开始回放
@@ -155,13 +199,14 @@ class DataPlayback(QObject):
     def stop(self):
         """停止回放"""
         self._timer.stop()
-        self._current_frame = 0
+        self._frame_iter = iter(self._frames)
 
     def _next_frame(self):
         """发送下一帧数据"""
-        if self._current_frame < len(self._frames):
-            self.playback_frame.emit(self._frames[self._current_frame])
-            self._current_frame += 1
-        else:
+        try:
+            frame = next(self._frame_iter)
+        except StopIteration:
             self._timer.stop()
-            self.playback_finished.emit()
\ No newline at end of file
+            self.playback_finished.emit()
+            return
+        self.playback_frame.emit(frame)
\ No newline at end of file
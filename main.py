@@ -1,7 +1,16 @@
+import asyncio
+import sys
+
+import qasync
+from PySide6.QtWidgets import QApplication
 from spectrometer_gui.main_window import MainWindow
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    # Qt事件循环与asyncio共用同一个循环，界面槽函数中可调度协程
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
     window = MainWindow()
     window.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    with loop:
+        sys.exit(loop.run_forever())
@@ -1,14 +1,41 @@
+import asyncio
+import time
+
 from PySide6.QtWidgets import (
     QMainWindow, QWidget, QTabWidget, QVBoxLayout,
     QGroupBox, QFormLayout, QLineEdit, QComboBox,
-    QPushButton, QLabel, QSpinBox
+    QPushButton, QLabel, QSpinBox, QCheckBox, QPlainTextEdit,
+    QStackedWidget
 )
-from PySide6.QtCore import Qt, Slot
+from PySide6.QtCore import Qt, Slot, QTimer
 from PySide6.QtGui import QPen, QColor
+import numpy as np
 from pyqtgraph import PlotWidget
 from spectrometer_gui.communication import SerialCommunicator, TcpCommunicator
+from spectrometer_gui.data_visualization import configure_plot_options
+
+# 光谱曲线画笔，全局共享一个实例；cosmetic画笔线宽不随视图缩放变换。
+# 画笔/画刷一律在模块级创建后复用，不要在绘图或逐点（散点符号）时重复构造
+_SPECTRUM_PEN = QPen(QColor(0, 255, 0))
+_SPECTRUM_PEN.setWidth(2)
+_SPECTRUM_PEN.setCosmetic(True)
+
+# 设备状态位的显示名称
+_STATUS_TEXT = {'ready': '就绪', 'error': '错误', 'calibrating': '校准中', 'measuring': '测量中'}
 
 class MainWindow(QMainWindow):
+    # 光谱绘图缓冲区的初始像素数，超出时按需扩容
+    MAX_PIXELS = 16384
+    # 流水线扫描时允许同时在途的扫描步数
+    SCAN_PIPELINE_DEPTH = 4
+    # 单个扫描步应答耗时的基础上限(秒)，另加积分时间×平均次数；
+    # 流水线扫描时一步可能排在前面的在途步之后，总超时按窗口深度放大
+    SCAN_STEP_TIMEOUT = 5.0
+    # 错误日志保留的最大行数，超出后自动丢弃最早的行
+    ERROR_LOG_MAX_LINES = 2000
+    # 状态栏刷新间隔(ms)，间隔内只显示最后一条普通状态
+    STATUS_INTERVAL = 100
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("AE8600光谱仪测试平台")
@@ -48,10 +75,11 @@ class MainWindow(QMainWindow):
         tcp_layout.addRow("端口", self.port_input)
         self.tcp_widget.setLayout(tcp_layout)
         
-        # 默认显示串口设置
-        conn_layout.addRow(self.serial_widget)
-        self.tcp_widget.hide()
-        conn_layout.addRow(self.tcp_widget)
+        # 串口/TCP参数页叠放，切换接口只改当前页索引，默认显示串口设置
+        self._iface_stack = QStackedWidget()
+        self._iface_stack.addWidget(self.serial_widget)
+        self._iface_stack.addWidget(self.tcp_widget)
+        conn_layout.addRow(self._iface_stack)
         
         # 连接按钮
         self.connect_btn = QPushButton("连接")
@@ -61,10 +89,63 @@ class MainWindow(QMainWindow):
         # 连接接口类型切换信号
         self.interface_combo.currentTextChanged.connect(self._on_interface_changed)
 
-        # 控制指令区域
-        control_tabs = QTabWidget()
+        # 错误日志立即创建以便记录监控页构建前的错误，由监控页负责布局
+        self.error_log_text = QPlainTextEdit()
+        self.error_log_text.setReadOnly(True)
+        self.error_log_text.setMaximumBlockCount(self.ERROR_LOG_MAX_LINES)
+
+        # 控制指令区域：默认页立即构建，其余页首次切换时再构建
+        self.control_tabs = QTabWidget()
+        self._value_labels = {}
+        self.control_tabs.addTab(self._build_basic_tab(), "基础控制")
+        self._tab_builders = {}
+        for builder, title in ((self._build_acquisition_tab, "数据采集"),
+                               (self._build_calibration_tab, "校准管理"),
+                               (self._build_monitor_tab, "系统监控")):
+            index = self.control_tabs.addTab(QWidget(), title)
+            self._tab_builders[index] = builder
+        self.control_tabs.currentChanged.connect(self._ensure_tab_built)
         
-        # 基础控制选项卡
+        # 光谱显示区域：关闭抗锯齿，PyOpenGL可用时使用OpenGL绘制
+        configure_plot_options()
+        self.plot_widget = PlotWidget(title="光谱数据")
+        self.plot_curve = self.plot_widget.plot(pen=_SPECTRUM_PEN)
+        # 按视图宽度峰值降采样并只绘制可见范围内的数据
+        self.plot_curve.setDownsampling(auto=True, method='peak')
+        self.plot_curve.setClipToView(True)
+        self.plot_widget.setDownsampling(ds=True, auto=True, mode='peak')
+        self.plot_widget.setClipToView(True)
+        # 预分配绘图缓冲区，每次更新只改写前n个元素
+        self._x_buffer = np.arange(self.MAX_PIXELS, dtype=np.float32)
+        self._y_buffer = np.empty(self.MAX_PIXELS, dtype=np.float32)
+        # 最近一次绘制的光谱，设备重复返回相同数据时跳过重绘
+        self._last_spectrum = None
+
+        # 状态显示
+        self.status_label = QLabel()
+        self.status_label.setAlignment(Qt.AlignCenter)
+        self._pending_status = None
+        self._status_timer = QTimer(self)
+        self._status_timer.setSingleShot(True)
+        self._status_timer.setInterval(self.STATUS_INTERVAL)
+        self._status_timer.timeout.connect(self._flush_status)
+
+        layout.addWidget(conn_group)
+        layout.addWidget(self.control_tabs)
+        layout.addWidget(self.plot_widget)
+        layout.addWidget(self.status_label)
+        main_widget.setLayout(layout)
+        self.setCentralWidget(main_widget)
+
+        # 连接信号
+        self.connect_btn.clicked.connect(self._handle_connect)
+
+    def _connect_senders(self, command_buttons):
+        """按(按钮, 指令, {参数名: 取值函数})对照表连接按钮"""
+        for btn, cmd, getters in command_buttons:
+            btn.clicked.connect(self._make_sender(cmd, getters))
+
+    def _build_basic_tab(self):
         basic_control_tab = QWidget()
         basic_layout = QFormLayout()
         
@@ -90,8 +171,18 @@ class MainWindow(QMainWindow):
         basic_layout.addRow(self.set_int_btn)
         basic_layout.addRow(self.read_int_btn)
         basic_control_tab.setLayout(basic_layout)
-        
-        # 数据采集选项卡
+
+        self._value_labels['WL'] = self.wl_value_label
+        self._value_labels['INTTIME'] = self.int_value_label
+        self._connect_senders([
+            (self.set_wl_btn, 'set_wavelength', {'value': self.wl_input.value}),
+            (self.read_wl_btn, 'read_wavelength', None),
+            (self.set_int_btn, 'set_integration', {'value': self.int_input.value}),
+            (self.read_int_btn, 'read_integration', None),
+        ])
+        return basic_control_tab
+
+    def _build_acquisition_tab(self):
         acquisition_tab = QWidget()
         acq_layout = QFormLayout()
         
@@ -117,6 +208,7 @@ class MainWindow(QMainWindow):
         self.step_wl_input.setRange(1, 100)
         self.scan_mode_combo = QComboBox()
         self.scan_mode_combo.addItems(["单次扫描", "重复扫描", "自动扫描"])
+        self.pipeline_scan_check = QCheckBox("流水线扫描（设备需支持指令排队）")
         self.scan_status_label = QLabel("--")
         self.start_scan_btn = QPushButton("开始扫描")
         self.stop_scan_btn = QPushButton("停止扫描")
@@ -125,12 +217,23 @@ class MainWindow(QMainWindow):
         acq_layout.addRow("起始波长(nm)", self.start_wl_input)
         acq_layout.addRow("终止波长(nm)", self.end_wl_input)
         acq_layout.addRow("步进值(nm)", self.step_wl_input)
+        acq_layout.addRow(self.pipeline_scan_check)
         acq_layout.addRow("扫描状态", self.scan_status_label)
         acq_layout.addRow(self.start_scan_btn)
         acq_layout.addRow(self.stop_scan_btn)
         acquisition_tab.setLayout(acq_layout)
-        
-        # 校准管理选项卡
+
+        self._value_labels['AVG'] = self.avg_value_label
+        self._connect_senders([
+            (self.set_avg_btn, 'set_average', {'value': self.avg_input.value}),
+            (self.read_avg_btn, 'read_average', None),
+            (self.start_acq_btn, 'read_spectrum', None),
+        ])
+        self.start_scan_btn.clicked.connect(self._on_start_scan)
+        self.stop_scan_btn.clicked.connect(self._stop_scan)
+        return acquisition_tab
+
+    def _build_calibration_tab(self):
         calibration_tab = QWidget()
         cal_layout = QFormLayout()
         
@@ -149,8 +252,13 @@ class MainWindow(QMainWindow):
         cal_layout.addRow(self.nonlinear_corr_check)
         cal_layout.addRow(self.advanced_cal_btn)
         calibration_tab.setLayout(cal_layout)
-        
-        # 系统监控选项卡
+
+        self._connect_senders([
+            (self.start_cal_btn, 'calibration', {'mode': self.cal_mode_combo.currentText}),
+        ])
+        return calibration_tab
+
+    def _build_monitor_tab(self):
         monitor_tab = QWidget()
         monitor_layout = QFormLayout()
         
@@ -159,71 +267,46 @@ class MainWindow(QMainWindow):
         self.firmware_version_label = QLabel("--")
         self.query_status_btn = QPushButton("查询状态")
         self.query_version_btn = QPushButton("查询版本")
-        self.error_log_text = QTextEdit()
-        self.error_log_text.setReadOnly(True)
         monitor_layout.addRow("设备状态", self.device_status_label)
         monitor_layout.addRow("固件版本", self.firmware_version_label)
         monitor_layout.addRow(self.query_status_btn)
         monitor_layout.addRow(self.query_version_btn)
         monitor_layout.addRow("错误日志", self.error_log_text)
         monitor_tab.setLayout(monitor_layout)
-        
-        control_tabs.addTab(basic_control_tab, "基础控制")
-        control_tabs.addTab(acquisition_tab, "数据采集")
-        control_tabs.addTab(calibration_tab, "校准管理")
-        control_tabs.addTab(monitor_tab, "系统监控")
-        
-        # 波长设置
-        wavelength_tab = QWidget()
-        wl_layout = QFormLayout()
-        self.wl_input = QSpinBox()
-        self.wl_input.setRange(200, 1000)
-        self.set_wl_btn = QPushButton("设置波长")
-        wl_layout.addRow("目标波长(nm)", self.wl_input)
-        wl_layout.addRow(self.set_wl_btn)
-        wavelength_tab.setLayout(wl_layout)
 
-        # 光谱显示区域
-        self.plot_widget = PlotWidget(title="光谱数据")
-        self.plot_curve = self.plot_widget.plot(pen=QPen(QColor(0, 255, 0), 2))
+        self._value_labels['STAT'] = self.device_status_label
+        self._value_labels['VER'] = self.firmware_version_label
+        self._connect_senders([
+            (self.query_status_btn, 'get_status', None),
+            (self.query_version_btn, 'get_version', None),
+        ])
+        return monitor_tab
 
-        # 状态显示
-        self.status_label = QLabel()
-        self.status_label.setAlignment(Qt.AlignCenter)
-
-        layout.addWidget(conn_group)
-        layout.addWidget(control_tabs)
-        layout.addWidget(self.plot_widget)
-        layout.addWidget(self.status_label)
-        main_widget.setLayout(layout)
-        self.setCentralWidget(main_widget)
-
-        # 连接信号
-        self.connect_btn.clicked.connect(self._handle_connect)
-        self.set_wl_btn.clicked.connect(self._set_wavelength)
-        self.read_wl_btn.clicked.connect(self._read_wavelength)
-        self.set_int_btn.clicked.connect(self._set_integration)
-        self.read_int_btn.clicked.connect(self._read_integration)
-        self.set_avg_btn.clicked.connect(self._set_average)
-        self.read_avg_btn.clicked.connect(self._read_average)
-        self.start_cal_btn.clicked.connect(self._start_calibration)
-        self.start_acq_btn.clicked.connect(self._start_acquisition)
-        self.query_status_btn.clicked.connect(self._query_status)
-        self.query_version_btn.clicked.connect(self._query_version)
-        self.start_scan_btn.clicked.connect(self._start_scan)
-        self.stop_scan_btn.clicked.connect(self._stop_scan)
+    @Slot(int)
+    def _ensure_tab_built(self, index):
+        """选项卡首次激活时构建真实页面并替换占位页"""
+        builder = self._tab_builders.pop(index, None)
+        if builder is None:
+            return
+        title = self.control_tabs.tabText(index)
+        page = builder()
+        # 替换过程中的当前页变化不应触发其他页的构建
+        placeholder = self.control_tabs.widget(index)
+        self.control_tabs.blockSignals(True)
+        self.control_tabs.removeTab(index)
+        self.control_tabs.insertTab(index, page, title)
+        self.control_tabs.setCurrentIndex(index)
+        self.control_tabs.blockSignals(False)
+        # removeTab不会删除页面，占位页需显式释放
+        placeholder.deleteLater()
 
     def _init_communication(self):
         self.communicator = None
+        self._scan_task = None
 
     @Slot(str)
     def _on_interface_changed(self, interface_type):
-        if interface_type == "串口":
-            self.serial_widget.show()
-            self.tcp_widget.hide()
-        else:
-            self.serial_widget.hide()
-            self.tcp_widget.show()
+        self._iface_stack.setCurrentIndex(0 if interface_type == "串口" else 1)
 
     @Slot()
     def _handle_connect(self):
@@ -245,83 +328,40 @@ class MainWindow(QMainWindow):
             self.communicator = None
             self.connect_btn.setText("连接")
 
-    @Slot()
-    def _set_wavelength(self):
-        if self.communicator:
-            self.communicator.send_command('set_wavelength', value=self.wl_input.value())
-
-    @Slot()
-    def _read_wavelength(self):
-        if self.communicator:
-            self.communicator.send_command('read_wavelength')
-
-    @Slot()
-    def _set_integration(self):
-        if self.communicator:
-            self.communicator.send_command('set_integration', value=self.int_input.value())
-
-    @Slot()
-    def _read_integration(self):
-        if self.communicator:
-            self.communicator.send_command('read_integration')
-
-    @Slot()
-    def _set_average(self):
-        if self.communicator:
-            self.communicator.send_command('set_average', value=self.avg_input.value())
-
-    @Slot()
-    def _read_average(self):
-        if self.communicator:
-            self.communicator.send_command('read_average')
-
-    @Slot()
-    def _start_calibration(self):
-        if self.communicator:
-            self.communicator.send_command('calibration',
-                                          mode=self.cal_mode_combo.currentText())
-
-    @Slot()
-    def _start_acquisition(self):
-        if self.communicator:
-            self.communicator.send_command('read_spectrum')
+    def _make_sender(self, cmd, getters=None):
+        """生成按钮点击时发送指定指令的回调，参数在点击时读取"""
+        def send(*_):
+            if self.communicator:
+                kwargs = {name: getter() for name, getter in getters.items()} if getters else {}
+                self.communicator.send_command(cmd, **kwargs)
+        return send
 
-    @Slot()
-    def _query_status(self):
-        if self.communicator:
-            self.communicator.send_command('get_status')
-
-    @Slot()
-    def _query_version(self):
-        if self.communicator:
-            self.communicator.send_command('get_version')
-
-    @Slot(dict)
+    @Slot(object)
     def _handle_response(self, response):
-        if not response['valid']:
-            self._update_status(f"错误: {response['error']}")
+        if not response.valid:
+            self._report_error(response.error)
             return
 
-        data = response['data']
+        data = response.data
         if 'error' in data:
-            self._update_status(f"错误: {data['error']}")
+            self._report_error(data['error'])
             return
 
         if 'spectrum' in data:
             self._plot_spectrum(data['spectrum'])
             self._update_status("光谱数据已更新")
         elif 'value' in data:
-            if response['command'] == 'WL':
-                self.wl_value_label.setText(str(data['value']))
-            elif response['command'] == 'INTTIME':
-                self.int_value_label.setText(str(data['value']))
-            elif response['command'] == 'AVG':
-                self.avg_value_label.setText(str(data['value']))
-            elif response['command'] == 'STAT':
-                self.device_status_label.setText(str(data['value']))
-            elif response['command'] == 'VER':
-                self.firmware_version_label.setText(str(data['value']))
+            # 所在选项卡尚未构建时没有对应标签，跳过显示
+            label = self._value_labels.get(response.command)
+            if label is not None:
+                label.setText(str(data['value']))
             self._update_status("参数已更新")
+        elif 'flags' in data:
+            label = self._value_labels.get(response.command)
+            if label is not None:
+                flags = data['flags']
+                active = [_STATUS_TEXT[name] for name in flags._fields if getattr(flags, name)]
+                label.setText("、".join(active) or "空闲")
         elif 'status' in data:
             if data['status'] == 'success':
                 self._update_status("校准完成")
@@ -331,48 +371,125 @@ class MainWindow(QMainWindow):
     @Slot(bool)
     def _handle_connection_change(self, connected):
         if connected:
-            self._update_status("设备已连接")
+            self._show_status("设备已连接")
         else:
-            self._update_status("设备已断开")
+            self._show_status("设备已断开")
+
+    def _report_error(self, error):
+        self.error_log_text.appendPlainText(f"{time.strftime('%H:%M:%S')} {error}")
+        self._show_status(f"错误: {error}")
 
     def _update_status(self, msg):
+        """普通状态按STATUS_INTERVAL节流刷新"""
+        self._pending_status = msg
+        if not self._status_timer.isActive():
+            self._status_timer.start()
+
+    @Slot()
+    def _flush_status(self):
+        if self._pending_status is not None:
+            self.status_label.setText(self._pending_status)
+            self._pending_status = None
+
+    def _show_status(self, msg):
+        """连接变化、错误等关键状态立即显示，并丢弃尚未显示的普通状态"""
+        self._pending_status = None
         self.status_label.setText(msg)
 
     def _plot_spectrum(self, data):
-        if isinstance(data, list) and len(data) > 0:
-            x = list(range(len(data)))
-            self.plot_curve.setData(x=x, y=data)
+        n = len(data)
+        if n > 0:
+            last = self._last_spectrum
+            if last is not None and len(last) == n and np.array_equal(last, data):
+                return
+            # 解析器每帧生成新数组，保存引用即可；不能引用会被改写的_y_buffer
+            self._last_spectrum = data
+            if n > len(self._y_buffer):
+                self._x_buffer = np.arange(n, dtype=np.float32)
+                self._y_buffer = np.empty(n, dtype=np.float32)
+            self._y_buffer[:n] = data
+            self.plot_curve.setData(x=self._x_buffer[:n], y=self._y_buffer[:n])
             self._update_status("光谱图已更新")
             
-    def _start_scan(self):
-        if self.communicator:
+    @Slot()
+    def _on_start_scan(self):
+        # 每次扫描是独立任务，停止时直接取消，避免旧扫描在重新开始后继续运行
+        if self._scan_task is not None:
+            self._scan_task.cancel()
+        self._scan_task = asyncio.ensure_future(self._start_scan())
+
+    async def _start_scan(self):
+        communicator = self.communicator
+        if communicator:
             start_wl = self.start_wl_input.value()
             end_wl = self.end_wl_input.value()
             step = self.step_wl_input.value()
             
             if start_wl >= end_wl:
-                self._update_status("错误：起始波长必须小于终止波长")
+                self._show_status("错误：起始波长必须小于终止波长")
                 return
                 
             self.start_scan_btn.setEnabled(False)
             self.stop_scan_btn.setEnabled(True)
             self.scan_status_label.setText("扫描中...")
             
-            # 开始扫描过程
-            current_wl = start_wl
-            while current_wl <= end_wl:
-                if not self.stop_scan_btn.isEnabled():
-                    break
-                    
-                self.communicator.send_command('set_wavelength', value=current_wl)
-                self.communicator.send_command('read_spectrum')
-                current_wl += step
+            # 开始扫描过程：滑动窗口限制在途步数，默认为1即逐步等待响应
+            depth = self.SCAN_PIPELINE_DEPTH if self.pipeline_scan_check.isChecked() else 1
+            window = asyncio.Semaphore(depth)
+            timeout = depth * (self.SCAN_STEP_TIMEOUT +
+                               self.int_input.value() * self.avg_input.value() / 1000)
+            in_flight = set()
+            try:
+                current_wl = start_wl
+                while current_wl <= end_wl:
+                    await window.acquire()
+                    # 取出已结束的扫描步，有步骤超时则立即中断，不再发送后续波长
+                    for task in [t for t in in_flight if t.done()]:
+                        in_flight.discard(task)
+                        task.result()
+                    in_flight.add(asyncio.ensure_future(
+                        self._scan_step(communicator, current_wl, window, timeout)))
+                    current_wl += step
+
+                await asyncio.gather(*in_flight)
+            except asyncio.CancelledError:
+                # 扫描被停止：一并取消仍在途的扫描步
+                for task in in_flight:
+                    task.cancel()
+                raise
+            except asyncio.TimeoutError:
+                for task in in_flight:
+                    task.cancel()
+                self._report_error("扫描步等待设备应答超时")
+                self.scan_status_label.setText("扫描中断")
+                self.start_scan_btn.setEnabled(True)
+                self.stop_scan_btn.setEnabled(False)
+                return
                 
             self.scan_status_label.setText("扫描完成")
             self.start_scan_btn.setEnabled(True)
             self.stop_scan_btn.setEnabled(False)
+
+    async def _scan_step(self, communicator, wavelength, window, timeout):
+        """执行一个扫描步，完成后释放窗口名额；设备未在timeout秒内应答时抛出TimeoutError"""
+        try:
+            # 两条指令先后提交再等待，由通信层合并为一次写入
+            wl_done = communicator.send_command('set_wavelength', value=wavelength)
+            spectrum_done = communicator.send_command('read_spectrum')
+            _, pending = await asyncio.wait((wl_done, spectrum_done), timeout=timeout)
+            if pending:
+                # 取消未完成的指令，其应答到达时仍按顺序被消耗
+                for future in pending:
+                    future.cancel()
+                raise asyncio.TimeoutError
+        finally:
+            window.release()
             
+    @Slot()
     def _stop_scan(self):
+        if self._scan_task is not None:
+            self._scan_task.cancel()
+            self._scan_task = None
         self.stop_scan_btn.setEnabled(False)
         self.start_scan_btn.setEnabled(True)
-        self.scan_status_label.setText("扫描已停止")
\ No newline at end of file
+        self.scan_status_label.setText("扫描已停止")
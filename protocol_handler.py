@@ -1,3 +1,133 @@
+import re
+import string
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+# 响应帧格式：$<载荷>*<两位十六进制校验和>，允许首尾空白（含\r\n）
+_FRAME_RE = re.compile(rb'\s*\$([^*]+)\*([0-9A-Fa-f]{2})\s*')
+
+# 校验和十六进制查找表：字节值 -> 高/低位字符，字符 -> 数值（大小写均可）
+_HEX = b'0123456789ABCDEF'
+_HEX_HI = bytes(_HEX[i >> 4] for i in range(256))
+_HEX_LO = bytes(_HEX[i & 0xF] for i in range(256))
+_HEX_VAL = bytearray(256)
+for _i, _c in enumerate(_HEX):
+    _HEX_VAL[_c] = _HEX_VAL[_c | 0x20] = _i
+_HEX_VAL = bytes(_HEX_VAL)
+del _i, _c
+
+
+def _checksum(data):
+    """
+    计算校验和：全部字节之和取低8位
+    data可为bytes或str，str按ASCII编码后计算
+    """
+    if isinstance(data, str):
+        data = data.encode('ascii')
+    return sum(data) & 0xFF
+
+
+def _build_frame(raw_bytes):
+    """为指令载荷加上帧头、校验和与行尾"""
+    checksum = _checksum(raw_bytes)
+    return b'$%b*%c%c\r\n' % (raw_bytes, _HEX_HI[checksum], _HEX_LO[checksum])
+
+
+def _unhex(pair):
+    """两位十六进制字符（已由_FRAME_RE校验）转为字节值"""
+    return (_HEX_VAL[pair[0]] << 4) | _HEX_VAL[pair[1]]
+
+
+def _compile_template(template):
+    """
+    预编译指令模板
+    无字段时返回原字符串；仅含一个简单字段时返回(前缀, 字段名, 后缀)；
+    其余情况返回None，由build_command回退到str.format
+    """
+    parsed = list(string.Formatter().parse(template))
+    fields = [(name, spec, conv) for _, name, spec, conv in parsed if name is not None]
+    if not fields:
+        return template.format()
+    if len(fields) == 1 and not fields[0][1] and not fields[0][2]:
+        prefix = parsed[0][0]
+        suffix = ''.join(literal for literal, *_ in parsed[1:])
+        return (prefix, fields[0][0], suffix)
+    return None
+
+
+def _parse_value(data):
+    """数值参数（波长、积分时间、平均次数）"""
+    return {'value': float(data) if b'.' in data else int(data)}
+
+
+def _parse_spectrum(data):
+    """光谱数据数组，由NumPy在C层完成逐值转换"""
+    text = data.decode('ascii')
+    values = np.fromstring(text, sep=',', dtype=np.float32)
+    if len(values) != text.count(',') + 1:
+        raise ValueError(f'malformed spectrum data: {text!r}')
+    return {'spectrum': values}
+
+
+def _parse_intensity(data):
+    """光强度"""
+    return {'intensity': float(data)}
+
+
+class StatusFlags(NamedTuple):
+    """设备状态位"""
+    ready: bool
+    error: bool
+    calibrating: bool
+    measuring: bool
+
+
+class ParsedFrame(NamedTuple):
+    """
+    响应帧解析结果
+    valid为True时command与data有效；为False时error说明原因，data为None
+    """
+    valid: bool
+    command: str = ''
+    data: Optional[dict] = None
+    error: str = ''
+
+
+def _parse_status(data):
+    """状态位"""
+    status_code = int(data, 16)
+    return {'flags': StatusFlags(
+        bool(status_code & 0x01),
+        bool(status_code & 0x02),
+        bool(status_code & 0x04),
+        bool(status_code & 0x08)
+    )}
+
+
+def _parse_version(data):
+    """固件版本"""
+    return {'version': data.decode('ascii').strip()}
+
+
+def _parse_cal(data):
+    """校准结果"""
+    return {'status': 'success' if data == b'OK' else 'error'}
+
+
+# 响应命令标识 -> 数据解析函数
+_PARSERS = {
+    b'WL': _parse_value,
+    b'INTTIME': _parse_value,
+    b'AVG': _parse_value,
+    b'SPT': _parse_spectrum,
+    b'INT': _parse_intensity,
+    b'STAT': _parse_status,
+    b'VER': _parse_version,
+    b'CAL': _parse_cal,
+}
+
+
 class ProtocolHandler:
     """
     AE8600光谱仪协议处理核心模块
@@ -23,76 +153,83 @@ class ProtocolHandler:
         'get_version': 'VER?'            # 读取固件版本
     }
 
+    # 预编译的指令模板，避免每次发送都重新解析格式字符串
+    _COMPILED = {k: _compile_template(v) for k, v in COMMAND_SET.items()}
+    # 无参数指令的完整帧在类加载时一次性生成
+    _FRAME_CACHE = {k: _build_frame(v.encode('ascii'))
+                    for k, v in _COMPILED.items() if isinstance(v, str)}
+
     @staticmethod
     def build_command(cmd_type, **kwargs):
         """
-        构造带校验和的完整指令
+        构造带校验和的完整指令，返回可直接写入设备的字节串
         """
-        raw_cmd = ProtocolHandler.COMMAND_SET[cmd_type].format(**kwargs)
-        checksum = sum(ord(c) for c in raw_cmd) % 256
-        return f"${raw_cmd}*{checksum:02X}\r\n"
+        cached = ProtocolHandler._FRAME_CACHE.get(cmd_type)
+        if cached is not None:
+            return cached
+        entry = ProtocolHandler._COMPILED[cmd_type]
+        if entry is None:
+            raw_cmd = ProtocolHandler.COMMAND_SET[cmd_type].format(**kwargs)
+        else:
+            prefix, field, suffix = entry
+            raw_cmd = prefix + str(kwargs[field]) + suffix
+        return _build_frame(raw_cmd.encode('ascii'))
 
     @staticmethod
     def parse_response(response):
         """
-        解析设备响应数据
-        返回格式：
-        {
-            'valid': bool,
-            'command': str,
-            'data': dict,
-            'error': str
-        }
+        解析设备响应数据，返回ParsedFrame
+        """
+        return ProtocolHandler.parse_response_bytes(response.encode('ascii', 'replace'))
+
+    @staticmethod
+    def parse_response_bytes(frame):
+        """
+        解析字节形式的设备响应数据
+        frame可为bytes、bytearray或memoryview，帧格式由预编译正则一次匹配，
+        数据部分按命令标识分派给对应解析函数，返回格式同parse_response
+        """
+        match = _FRAME_RE.fullmatch(frame)
+        if not match:
+            return ParsedFrame(False, error='Invalid frame format')
+
+        payload, checksum = match.groups()
+        if _checksum(payload) != _unhex(checksum):
+            return ParsedFrame(False, error='Checksum mismatch')
+
+        cmd, _, data = payload.partition(b' ')
+        return ParsedFrame(
+            True,
+            cmd.decode('ascii', 'replace'),
+            ProtocolHandler._parse_payload(cmd, data, payload)
+        )
+
+    @staticmethod
+    def parse_intensity_bytes(frame):
+        """
+        光强度响应帧（$INT <value>*XX）的快速解析路径
+        不构造ParsedFrame，直接返回强度值；非强度帧或帧无效时返回None，
+        调用方可回退到parse_response_bytes获取错误信息
         """
-        if not response.startswith('$') or '*' not in response:
-            return {'valid': False, 'error': 'Invalid frame format'}
+        match = _FRAME_RE.fullmatch(frame)
+        if not match:
+            return None
 
+        payload, checksum = match.groups()
+        if not payload.startswith(b'INT ') or _checksum(payload) != _unhex(checksum):
+            return None
         try:
-            payload, checksum = response[1:-3].split('*')
-            calculated_csum = sum(ord(c) for c in payload) % 256
-            if calculated_csum != int(checksum, 16):
-                return {'valid': False, 'error': 'Checksum mismatch'}
-
-            return {
-                'valid': True,
-                'command': payload.split(' ')[0],
-                'data': ProtocolHandler._parse_payload(payload)
-            }
-        except Exception as e:
-            return {'valid': False, 'error': f'Parsing error: {str(e)}'}
+            return float(payload[4:])
+        except ValueError:
+            return None
 
     @staticmethod
-    def _parse_payload(payload):
+    def _parse_payload(cmd, data, payload):
         """解析不同类型的响应数据"""
+        parser = _PARSERS.get(cmd)
+        if parser is None:
+            return {'raw': payload.decode('ascii', 'replace')}
         try:
-            # 分离命令和数据部分
-            parts = payload.split(' ', 1)
-            cmd = parts[0]
-            data = parts[1] if len(parts) > 1 else ''
-
-            # 根据命令类型解析数据
-            if cmd in ['WL', 'INTTIME', 'AVG']:
-                return {'value': float(data) if '.' in data else int(data)}
-            elif cmd == 'SPT':
-                # 解析光谱数据数组
-                values = [float(x) for x in data.split(',')]
-                return {'spectrum': values}
-            elif cmd == 'INT':
-                return {'intensity': float(data)}
-            elif cmd == 'STAT':
-                # 状态位解析
-                status_code = int(data, 16)
-                return {
-                    'ready': bool(status_code & 0x01),
-                    'error': bool(status_code & 0x02),
-                    'calibrating': bool(status_code & 0x04),
-                    'measuring': bool(status_code & 0x08)
-                }
-            elif cmd == 'VER':
-                return {'version': data.strip()}
-            elif cmd == 'CAL':
-                return {'status': 'success' if data == 'OK' else 'error'}
-            else:
-                return {'raw': payload}
-        except Exception as e:
-            return {'error': f'Data parsing error: {str(e)}'}
\ No newline at end of file
+            return parser(data)
+        except ValueError as e:
+            return {'error': f'Data parsing error: {str(e)}'}